@@ -177,6 +177,7 @@ class MainWindow:
         self.grabber.grab_frame()
 
     def start_stop_recording(self):
+        self.grabber.enumerate_devices()
         audio_devices = self.grabber.get_audio_devices()
         video_compressors = self.grabber.get_video_compressors()
         audio_compressors = self.grabber.get_audio_compressors()
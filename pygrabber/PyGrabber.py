@@ -39,6 +39,10 @@ class PyGrabber:
         self.preview_graph_prepared = False
         self.recording_prepared = False
 
+    def enumerate_devices(self):
+        # one pass over all the device categories, before filling several device lists
+        self.graph.enumerate_all()
+
     def get_video_devices(self):
         return self.graph.get_input_devices()
 
@@ -116,7 +120,7 @@ class PyGrabber:
         if graph_state == StateGraph.Stopped:
             return 'Stopped'
         elif graph_state == StateGraph.Running:
-            return f"{'Recording' if self.graph.is_recording else 'Playing'} {device_name} [{resolution[0]}x{resolution[1]}]"
+            return f"{'Recording' if self.graph.is_recording else 'Playing'} {device_name} [{resolution['width']}x{resolution['height']}]"
         elif graph_state == StateGraph.Paused:
             return f'Connected to {device_name} - paused'
         return None
@@ -29,26 +29,33 @@
 from __future__ import annotations
 
 import os.path
+import sys
 from collections.abc import Callable
-from ctypes import POINTER, byref, cast, create_unicode_buffer, pointer, windll, wstring_at, c_longlong, c_long
+from concurrent.futures import ThreadPoolExecutor
+from ctypes import POINTER, byref, cast, create_unicode_buffer, windll, wstring_at, c_longlong, c_long, c_ulong, c_void_p
 from ctypes.wintypes import DWORD, SIZE
 from enum import Enum
-from typing import Literal, TypedDict, Union, cast as type_cast
+from functools import cached_property, lru_cache
+from typing import Literal, TypedDict, TypeVar, Union, cast as type_cast
 
 import numpy as np
 import numpy.typing as npt
-from comtypes import GUID, COMError, COMObject, client
+from comtypes import COINIT_APARTMENTTHREADED, COINIT_MULTITHREADED, GUID, COMError, COMObject, CoInitializeEx, CoUninitialize, client
 from comtypes.persist import IPropertyBag
 
 from .dshow_core import (IBASEFILTER, ICAPTUREGRAPHBUILDER2, IFILTERGRAPH, IPIN, PIN_OUT, VIDEO_STREAM_CONFIG_CAPS, VIDEOINFOHEADER,
                             IAMStreamConfig, IAMVideoControl, ICaptureGraphBuilder2, ICreateDevEnum, ISampleGrabber,
                             ISpecifyPropertyPages, IVideoWindow, qedit, quartz)
 from .dshow_ids import DeviceCategories, MediaSubtypes, MediaTypes, PinCategory, clsids, FormatTypes, subtypes
-from .moniker import IMONIKER
+from .moniker import IMONIKER, IMoniker
 from .win_api_extra import LPUNKNOWN, WS_CHILD, WS_CLIPSIBLINGS, OleCreatePropertyFrame
 from .windows_media import IWMPROFILE, IWMProfileManager2, WMCreateProfileManager
 
 Mat = np.ndarray[int, np.dtype[np.generic]]
+# DirectShow expresses frame intervals in 100 ns units
+HNS_PER_SECOND = 10_000_000.0
+T = TypeVar('T')
+R = TypeVar('R')
 
 
 class StateGraph(Enum):
@@ -80,6 +87,7 @@ class Filter:
         self.instance = instance
         self.capture_builder = capture_builder
         self.Name = name
+        self._name: str | None = None
         self.out_pins: list[IPIN] = []
         self.in_pins: list[IPIN] = []
         self.reload_pins()
@@ -100,37 +108,35 @@ class Filter:
         # 0 = in, 1 = out
         self.out_pins = []
         self.in_pins = []
-        enum = self.instance.EnumPins()
-        pin, count = enum.Next(1)
-        while count > 0:
+        for pin in enum_items(self.instance.EnumPins(), qedit.IPin):
             if pin.QueryDirection() == 0:
                 self.in_pins.append(pin)
             else:
                 self.out_pins.append(pin)
-            pin, count = enum.Next(1)
 
     def set_properties(self):
         show_properties(self.instance)
 
     def get_name(self):
-        filter_info = self.instance.QueryFilterInfo()
-        return wstring_at(filter_info.achName)
+        if self._name is None:
+            name = get_filter_name(self.instance)
+            if not name:
+                return name  # a filter only gets its name when it is added to a graph
+            self._name = name
+        return self._name
 
     def print_info(self):
         print(f"Pins of: {self.get_name()}")
-        enum = self.instance.EnumPins()
-        pin, count = enum.Next(1)
-        while count > 0:
+        for pin in enum_items(self.instance.EnumPins(), qedit.IPin):
             info = pin.QueryPinInfo()
             direction, name = (info.dir, wstring_at(info.achName))
             print(f"PIN {'in' if direction == 0 else 'out'} - {name}")
-            pin, count = enum.Next(1)
 
 
 class FrameRateManager:
-    def __init__(self, pin: IPIN):
+    def __init__(self, pin: IPIN, stream_config: IAMStreamConfig | None = None):
         self.pin = pin
-        self.stream_config = pin.QueryInterface(IAMStreamConfig)
+        self.stream_config = stream_config if stream_config is not None else pin.QueryInterface(IAMStreamConfig)
         try:
             self.video_control = pin.QueryInterface(IAMVideoControl)
         except COMError:
@@ -147,17 +153,21 @@ class FrameRateManager:
 
     def _calculate_fps(self, caps: VIDEO_STREAM_CONFIG_CAPS) -> list[float]:
         if caps.MinFrameInterval == caps.MaxFrameInterval:
-            return [round(10**7 / caps.MinFrameInterval, 2)]
+            return [round(HNS_PER_SECOND / caps.MinFrameInterval, 2)]
         
         step = caps.OutputGranularityX * 100000  # Шаг в 100ns
-        return [
-            round(10**7 / interval, 2)
-            for interval in range(
-                caps.MinFrameInterval,
-                caps.MaxFrameInterval + step,
-                step
-            )
-        ]
+        if (caps.MaxFrameInterval - caps.MinFrameInterval) // step < 8:
+            # too few entries to pay for the NumPy round-trip
+            return [
+                round(HNS_PER_SECOND / interval, 2)
+                for interval in range(
+                    caps.MinFrameInterval,
+                    caps.MaxFrameInterval + step,
+                    step
+                )
+            ]
+        intervals = np.arange(caps.MinFrameInterval, caps.MaxFrameInterval + step, step, dtype=np.int64)
+        return np.round(HNS_PER_SECOND / intervals, 2).tolist()
 
     def _get_exact_fps(self, index: int, media_type) -> list[float]:
         p_list = POINTER(c_longlong)()
@@ -177,8 +187,11 @@ class FrameRateManager:
         if hr != 0 or size.value == 0:
             return []
         
-        fps_array = cast(p_list, POINTER(c_longlong * size.value)).contents
-        return [round(10**7 / value, 2) for value in fps_array]
+        try:
+            intervals = np.ctypeslib.as_array(p_list, shape=(size.value,))
+            return np.round(HNS_PER_SECOND / intervals, 2).tolist()
+        finally:
+            windll.ole32.CoTaskMemFree(p_list)
 
 
 class FormatTypedDict(TypedDict):
@@ -191,19 +204,40 @@ class FormatTypedDict(TypedDict):
     max_framerate: float
 
 
+class FormatArraysTypedDict(TypedDict):
+    index: npt.NDArray[np.int32]
+    media_type_str: list[str]
+    width: npt.NDArray[np.int32]
+    height: npt.NDArray[np.int32]
+    exact_fps: list[list[float]]
+    min_frame_interval: npt.NDArray[np.int64]
+    max_frame_interval: npt.NDArray[np.int64]
+    min_framerate: npt.NDArray[np.float64]
+    max_framerate: npt.NDArray[np.float64]
+
+
 class VideoInput(Filter):
     def __init__(self, args: tuple[IBASEFILTER, str], capture_builder: ICAPTUREGRAPHBUILDER2):
         Filter.__init__(self, args[0], args[1], capture_builder)
+        self._current_format_cache = None
+
+    @cached_property
+    def stream_config(self) -> IAMStreamConfig:
+        return self.get_out().QueryInterface(IAMStreamConfig)
+
+    def reload_pins(self):
+        Filter.reload_pins(self)
+        self.__dict__.pop('stream_config', None)  # bound to the previous output pin
 
     def get_current_format_index(self) -> int:
-        stream_config = self.get_out().QueryInterface(IAMStreamConfig)
+        stream_config = self.stream_config
         current_media_type = stream_config.GetFormat()
         p_video_info_header = cast(current_media_type.contents.pbFormat, POINTER(VIDEOINFOHEADER))
         current_bmp_header = p_video_info_header.contents.bmi_header
         media_types_count, _ = stream_config.GetNumberOfCapabilities()
         for i in range(media_types_count):
             media_type, _ = stream_config.GetStreamCaps(i) 
-            if GUID(FormatTypes.FORMAT_VideoInfo) == media_type.contents.formattype: 
+            if _guid(FormatTypes.FORMAT_VideoInfo) == media_type.contents.formattype: 
                 p_available_info_header = cast(media_type.contents.pbFormat, POINTER(VIDEOINFOHEADER)) 
                 available_bmp_header = p_available_info_header.contents.bmi_header 
             if (available_bmp_header.biWidth == current_bmp_header.biWidth and 
@@ -214,54 +248,105 @@ class VideoInput(Filter):
         return -1 # Format not found
 
     def get_current_format(self):
-        stream_config = self.get_out().QueryInterface(IAMStreamConfig)
+        # called on every window resize: the cached format is dropped by set_format, the format dialog and
+        # whenever the graph is (re)connected, since Connect negotiates the media type of the pin
+        if self._current_format_cache is None:
+            self._current_format_cache = self.__query_current_format()
+        return dict(self._current_format_cache)
+
+    def invalidate_current_format(self):
+        self._current_format_cache = None
+
+    def __query_current_format(self):
+        stream_config = self.stream_config
         current_format_index = self.get_current_format_index()
         media_type = stream_config.GetStreamCaps(current_format_index)[0]
         p_video_info_header = cast(media_type.contents.pbFormat, POINTER(VIDEOINFOHEADER))
         bmp_header = p_video_info_header.contents.bmi_header
-        stream_config = self.get_out().QueryInterface(IAMStreamConfig)
         media_type = stream_config.GetFormat()
         p_video_info_header = cast(media_type.contents.pbFormat, POINTER(VIDEOINFOHEADER))
         avg_time_per_frame = p_video_info_header.contents.avg_time_per_frame
-        fps = 10000000.0 / avg_time_per_frame if avg_time_per_frame > 0 else 0.
+        fps = HNS_PER_SECOND / avg_time_per_frame if avg_time_per_frame > 0 else 0.
         return {
             'index': current_format_index,
-            'media_type_str': subtypes[str(media_type.contents.subtype)],
+            'media_type_str': get_subtype_name(media_type.contents.subtype),
             'width': bmp_header.biWidth,
             'height': bmp_header.biHeight,
             'fps': fps
         }
 
-    def get_formats(self):
+    def get_formats(self) -> list[FormatTypedDict]:
+        formats = self.get_format_arrays()
+        return [
+            {
+                'index': index,
+                'media_type_str': media_type_str,
+                'width': width,
+                'height': height,
+                'exact_fps': exact_fps,
+                'min_framerate': min_framerate,
+                'max_framerate': max_framerate
+            }
+            for index, media_type_str, width, height, exact_fps, min_framerate, max_framerate in zip(
+                formats['index'].tolist(),
+                formats['media_type_str'],
+                formats['width'].tolist(),
+                formats['height'].tolist(),
+                formats['exact_fps'],
+                formats['min_framerate'].tolist(),
+                formats['max_framerate'].tolist(),
+            )
+        ]
+
+    def get_format_arrays(self) -> FormatArraysTypedDict:
+        # same content as get_formats, one array (or list) per field
         # https://docs.microsoft.com/en-us/windows/win32/directshow/configure-the-video-output-format
-        stream_config = self.get_out().QueryInterface(IAMStreamConfig)
+        stream_config = self.stream_config
         media_types_count, _ = stream_config.GetNumberOfCapabilities()
-        fps_manager = FrameRateManager(self.get_out())
-        result: list[FormatTypedDict] = []
+        fps_manager = FrameRateManager(self.get_out(), stream_config)
+        indices = np.empty(media_types_count, dtype=np.int32)
+        widths = np.empty(media_types_count, dtype=np.int32)
+        heights = np.empty(media_types_count, dtype=np.int32)
+        min_frame_intervals = np.empty(media_types_count, dtype=np.int64)
+        max_frame_intervals = np.empty(media_types_count, dtype=np.int64)
+        media_type_strs: list[str] = []
+        n = 0
         for i in range(0, media_types_count):
             media_type, capability = stream_config.GetStreamCaps(i)
-            if GUID(FormatTypes.FORMAT_VideoInfo) == media_type.contents.formattype:
+            if _guid(FormatTypes.FORMAT_VideoInfo) == media_type.contents.formattype:
                 p_video_info_header = cast(media_type.contents.pbFormat, POINTER(VIDEOINFOHEADER))
                 bmp_header = p_video_info_header.contents.bmi_header
-                result.append({
-                    'index': i,
-                    'media_type_str': subtypes[str(media_type.contents.subtype)],
-                    'width': bmp_header.biWidth,
-                    'height': bmp_header.biHeight,
-                    'exact_fps': fps_manager.get_available_fps(i),
-                    'min_framerate': 10000000 / capability.MaxFrameInterval,
-                    'max_framerate': 10000000 / capability.MinFrameInterval
-                })
+                indices[n] = i
+                widths[n] = bmp_header.biWidth
+                heights[n] = bmp_header.biHeight
+                min_frame_intervals[n] = capability.MinFrameInterval
+                max_frame_intervals[n] = capability.MaxFrameInterval
+                media_type_strs.append(get_subtype_name(media_type.contents.subtype))
+                n += 1
             # print(f"{capability.MinOutputSize.cx}x{capability.MinOutputSize.cx} - {capability.MaxOutputSize.cx}x{capability.MaxOutputSize.cx}")
-        return result
+        # GetFrameRateList goes down to the driver: probe the formats concurrently when COM allows it
+        fps_lists = map_com_calls(fps_manager.get_available_fps, indices[:n].tolist())
+        return {
+            'index': indices[:n],
+            'media_type_str': media_type_strs,
+            'width': widths[:n],
+            'height': heights[:n],
+            'exact_fps': fps_lists,
+            'min_frame_interval': min_frame_intervals[:n],
+            'max_frame_interval': max_frame_intervals[:n],
+            'min_framerate': HNS_PER_SECOND / max_frame_intervals[:n],
+            'max_framerate': HNS_PER_SECOND / min_frame_intervals[:n]
+        }
 
     def set_format(self, format_index: int):
-        stream_config = self.get_out().QueryInterface(IAMStreamConfig)
+        stream_config = self.stream_config
         media_type, _ = stream_config.GetStreamCaps(format_index)
         stream_config.SetFormat(media_type)
+        self.invalidate_current_format()
 
     def show_format_dialog(self):
         show_properties(self.get_out())
+        self.invalidate_current_format()
 
 
 class AudioInput(Filter):
@@ -349,29 +434,60 @@ FiltersDict = dict[
 
 
 class SystemDeviceEnum:
+    # categories listed by FilterGraph, enumerated together by enumerate_all
+    device_categories = (
+        DeviceCategories.VideoInputDevice,
+        DeviceCategories.AudioInputDevice,
+        DeviceCategories.VideoCompressor,
+        DeviceCategories.AudioCompressor,
+    )
+
     def __init__(self):
         self.system_device_enum = client.CreateObject(clsids.CLSID_SystemDeviceEnum, interface=ICreateDevEnum)
+        self._moniker_cache: dict[str, list[IMONIKER]] = {}
+
+    def refresh(self):
+        # forget the enumerated monikers, e.g. after a device has been plugged in or removed
+        self._moniker_cache = {}
+
+    def _enum(self, category_clsid: str) -> list[IMONIKER]:
+        if category_clsid not in self._moniker_cache:
+            filter_enumerator = self.system_device_enum.CreateClassEnumerator(_guid(category_clsid), dwFlags=0)
+            monikers: list[IMONIKER] = []
+            if filter_enumerator:  # the category is empty: no enumerator is returned
+                monikers = list(enum_items(filter_enumerator, IMoniker))
+            self._moniker_cache[category_clsid] = monikers
+        return self._moniker_cache[category_clsid]
+
+    def _skip_to(self, category_clsid: str, index: int) -> IMONIKER:
+        # category not enumerated yet: let the enumerator advance to the requested device in a single call
+        filter_enumerator = self.system_device_enum.CreateClassEnumerator(_guid(category_clsid), dwFlags=0)
+        if not filter_enumerator:
+            raise IndexError('device index out of range')
+        try:
+            filter_enumerator.Skip(index)
+        except COMError:
+            return self._enum(category_clsid)[index]  # Skip not implemented by the enumerator
+        moniker, count = filter_enumerator.Next(1)
+        if count == 0:
+            raise IndexError('device index out of range')
+        return moniker
+
+    def enumerate_all(self):
+        for category_clsid in self.device_categories:
+            self._enum(category_clsid)
 
     def get_available_filters(self, category_clsid: str):
-        filter_enumerator = self.system_device_enum.CreateClassEnumerator(GUID(category_clsid), dwFlags=0)
-        result: list[str] = []
-        try:
-            moniker, count = filter_enumerator.Next(1)
-        except ValueError:
-            return result
-        while count > 0:
-            result.append(get_moniker_name(moniker))
-            moniker, count = filter_enumerator.Next(1)
+        result: list[str] = [get_moniker_name(moniker) for moniker in self._enum(category_clsid)]
         return result
 
     def get_filter_by_index(self, category_clsid: str, index: int) -> tuple[IBASEFILTER, str]:
-        filter_enumerator = self.system_device_enum.CreateClassEnumerator(GUID(category_clsid), dwFlags=0)
-        moniker, count = filter_enumerator.Next(1)
-        i = 0
-        while i != index and count > 0:
-            moniker, count = filter_enumerator.Next(1)
-            i = i + 1
-
+        if index < 0:
+            raise IndexError('device index out of range')
+        if category_clsid in self._moniker_cache:
+            moniker = self._enum(category_clsid)[index]
+        else:
+            moniker = self._skip_to(category_clsid, index)
         return moniker.BindToObject(0, 0, qedit.IBaseFilter._iid_).QueryInterface(qedit.IBaseFilter), \
             get_moniker_name(moniker)
 
@@ -391,7 +507,7 @@ class FilterFactory:
         elif filter_type == FilterType.audio_compressor:
             return AudioCompressor(self.system_device_enum.get_filter_by_index(DeviceCategories.AudioCompressor, id), self.capture_builder)
         elif filter_type == FilterType.render:
-            return Render(client.CreateObject(GUID(id), interface=qedit.IBaseFilter), self.capture_builder)
+            return Render(client.CreateObject(_guid(id), interface=qedit.IBaseFilter), self.capture_builder)
         elif filter_type == FilterType.sample_grabber:
             return SampleGrabber(self.capture_builder)
         elif filter_type == FilterType.muxer:
@@ -423,7 +539,7 @@ class WmProfileManager:
         buf = create_unicode_buffer(200)
         for profile in profiles:
             i = DWORD(200)
-            profile.GetName(buf, pointer(i))
+            profile.GetName(buf, byref(i))
             profiles_names.append(buf.value)
         return profiles, profiles_names
 
@@ -442,12 +558,16 @@ class FilterGraph:
 
         self.system_device_enum = SystemDeviceEnum()
         self.filter_factory = FilterFactory(self.system_device_enum, self.capture_builder)
-        self.wm_profile_manager = WmProfileManager()
 
         self.filters: FiltersDict = {}
         self.recording_format = None
         self.is_recording = False
 
+    @cached_property
+    def wm_profile_manager(self) -> WmProfileManager:
+        # loading the system profiles is only needed to list the ASF profiles
+        return WmProfileManager()
+
     def __add_filter(self, filter_type: FilterType, filter_id: int | None):
         assert filter_type not in self.filters
         filter = self.filter_factory.build_filter(filter_type, filter_id)
@@ -466,10 +586,10 @@ class FilterGraph:
     def add_audio_compressor(self, index: int):
         self.__add_filter(FilterType.audio_compressor, index)
 
-    def add_sample_grabber(self, callback: Callable[[Mat], None]):
+    def add_sample_grabber(self, callback: Callable[[Mat], None], zero_copy: bool = False):
         self.__add_filter(FilterType.sample_grabber, None)
         sample_grabber = self.filters[FilterType.sample_grabber]
-        sample_grabber_cb = SampleGrabberCallback(callback)
+        sample_grabber_cb = SampleGrabberCallback(callback, zero_copy)
         sample_grabber.set_callback(sample_grabber_cb, 1)
         sample_grabber.set_media_type(MediaTypes.Video, MediaSubtypes.RGB24)
 
@@ -486,7 +606,7 @@ class FilterGraph:
         extension = os.path.splitext(filename)[1].upper()
         mediasubtype = MediaSubtypes.ASF if extension == ".WMV" else MediaSubtypes.AVI
         self.recording_format = RecordingFormat.ASF if extension == ".WMV" else RecordingFormat.AVI
-        mux, filesink = self.capture_builder.SetOutputFileName(GUID(mediasubtype), filename)
+        mux, filesink = self.capture_builder.SetOutputFileName(_guid(mediasubtype), filename)
         self.filters[FilterType.muxer] = self.filter_factory.build_filter(FilterType.muxer, mux)
 
     def configure_asf_compressor(self):
@@ -507,11 +627,12 @@ class FilterGraph:
             self.graph_builder.Connect(self.filters[FilterType.sample_grabber].get_out(),
                                        self.filters[FilterType.render].get_in())
             self.filters[FilterType.sample_grabber].initialize_after_connection()
+        self.filters[FilterType.video_input].invalidate_current_format()
         self.is_recording = False
 
     def __get_capture_and_preview_pins(self):
-        preview_pin: IPIN = self.filters[FilterType.video_input].find_pin(PIN_OUT, category=GUID(PinCategory.Preview))
-        capture_pin: IPIN = self.filters[FilterType.video_input].find_pin(PIN_OUT, category=GUID(PinCategory.Capture))
+        preview_pin: IPIN = self.filters[FilterType.video_input].find_pin(PIN_OUT, category=_guid(PinCategory.Preview))
+        capture_pin: IPIN = self.filters[FilterType.video_input].find_pin(PIN_OUT, category=_guid(PinCategory.Capture))
 
         if (preview_pin is None) or (capture_pin is None):
             self.__add_filter(FilterType.smart_tee, None)
@@ -552,6 +673,7 @@ class FilterGraph:
                 self.graph_builder.Connect(self.filters[FilterType.audio_compressor].get_out(),
                                            self.filters[FilterType.muxer].get_in(1))
 
+        self.filters[FilterType.video_input].invalidate_current_format()
         self.is_recording = True
 
     def configure_render(self, handle: int):
@@ -559,7 +681,8 @@ class FilterGraph:
 
     def update_window(self, width: int, height: int):
         if FilterType.render in self.filters:
-            img_w, img_h = self.filters[FilterType.video_input].get_current_format()
+            current_format = self.filters[FilterType.video_input].get_current_format()
+            img_w, img_h = current_format['width'], current_format['height']
             scale_w = width / img_w
             scale_h = height / img_h
             scale = min(scale_w, scale_h, 1)
@@ -582,6 +705,12 @@ class FilterGraph:
     def get_state(self):
         return StateGraph(self.media_control.GetState(0xFFFFFFFF))  # 0xFFFFFFFF = infinite timeout
 
+    def enumerate_all(self):
+        self.system_device_enum.enumerate_all()
+
+    def refresh_devices(self):
+        self.system_device_enum.refresh()
+
     def get_input_devices(self):
         return self.system_device_enum.get_available_filters(DeviceCategories.VideoInputDevice)
 
@@ -608,23 +737,16 @@ class FilterGraph:
         return self.filters[FilterType.video_input]
 
     def remove_filters(self):
-        enum_filters = self.filter_graph.EnumFilters()
-        filt, count = enum_filters.Next(1)
-        while count > 0:
+        # removing a filter invalidates the enumerator: take a snapshot of the graph first
+        filters_to_delete = list(enum_items(self.filter_graph.EnumFilters(), qedit.IBaseFilter))
+        for filt in filters_to_delete:
             self.filter_graph.RemoveFilter(filt)
-            enum_filters.Reset()
-            filt, count = enum_filters.Next(1)
         self.filters = {}
 
     def remove_all_filters_but_video_source(self):
         video_input = self.filters[FilterType.video_input]
         enum_filters = self.filter_graph.EnumFilters()
-        filters_to_delete = []
-        filt, count = enum_filters.Next(1)
-        while count > 0:
-            if filt != video_input.instance:
-                filters_to_delete.append(filt)
-            filt, count = enum_filters.Next(1)
+        filters_to_delete = [filt for filt in enum_items(enum_filters, qedit.IBaseFilter) if filt != video_input.instance]
         for filt in filters_to_delete:
             self.filter_graph.RemoveFilter(filt)
         self.filters = {FilterType.video_input: video_input}
@@ -640,30 +762,39 @@ class FilterGraphDebugHelper:
         self.filter_graph = filter_graph
 
     def print_graph_info(self):
-        enum_filters = self.filter_graph.EnumFilters()
-        filt, count = enum_filters.Next(1)
-        while count > 0:
-            filterName = self.get_filter_name(filt)
-            print(f"FILTER {filterName} [{filt}]")
-
-            enum_pins = filt.EnumPins()
-            pin, count = enum_pins.Next(1)
-            while count > 0:
+        # walk the graph first, then print: no COM calls are interleaved with the output
+        nodes = []
+        # a filter is usually reached several times (once itself, once per connected pin): query its name once.
+        # The filters are kept alive next to their names, so the addresses cannot be reused during the walk
+        filter_names: dict[int, tuple[IBASEFILTER, str]] = {}
+
+        def name_of(filt: IBASEFILTER) -> str:
+            key = cast(filt, c_void_p).value
+            if key not in filter_names:
+                filter_names[key] = (filt, self.get_filter_name(filt))
+            return filter_names[key][1]
+
+        for filt in enum_items(self.filter_graph.EnumFilters(), qedit.IBaseFilter):
+            pins = []
+            for pin in enum_items(filt.EnumPins(), qedit.IPin):
                 pin_name, direction, connected_pin, owner = self.get_pin_info(pin)
                 connected_filter_name = None
                 if connected_pin is not None:
                     connected_pin_name, _, _, connected_filter = self.get_pin_info(connected_pin)
-                    connected_filter_name = self.get_filter_name(connected_filter)
-
-                print(f" - PIN {pin_name} {'in' if direction == 0 else 'out'}"
-                      f" - Connected to: {connected_filter_name} [{pin}]")
-
-                pin, count = enum_pins.Next(1)
-            filt, count = enum_filters.Next(1)
+                    connected_filter_name = name_of(connected_filter)
+                pins.append((pin, pin_name, direction, connected_filter_name))
+            nodes.append((filt, name_of(filt), pins))
+
+        lines = []
+        for filt, filter_name, pins in nodes:
+            lines.append(f"FILTER {filter_name} [{filt}]")
+            for pin, pin_name, direction, connected_filter_name in pins:
+                lines.append(f" - PIN {pin_name} {'in' if direction == 0 else 'out'}"
+                             f" - Connected to: {connected_filter_name} [{pin}]")
+        print("\n".join(lines))
 
     def get_filter_name(self, filter: IBASEFILTER):
-        filter_info = filter.QueryFilterInfo()
-        return wstring_at(filter_info.achName)
+        return get_filter_name(filter)
 
     def get_pin_info(self, pin: IPIN):
         info = pin.QueryPinInfo()
@@ -682,13 +813,27 @@ NPBUFFER = Union[object, npt.ArrayLike]
 class SampleGrabberCallback(COMObject):
     _com_interfaces_ = [qedit.ISampleGrabberCB]
 
-    def __init__(self, callback: Callable[[Mat], None]):
+    def __init__(self, callback: Callable[[Mat], None], zero_copy: bool = False):
+        # With zero_copy the callback receives a read-only, C-contiguous view on the sample buffer instead of a copy.
+        # The frame is bottom-up (first row is the bottom of the image) and the view is only valid until the
+        # callback returns: copy what you need before returning.
         self.callback = callback
+        self.zero_copy = zero_copy
         self.cnt = 0
         self.keep_photo = False
-        self.image_resolution: tuple[int, int] = (0, 0)
+        self.image_resolution = (0, 0)
         super(SampleGrabberCallback, self).__init__()
 
+    @property
+    def image_resolution(self) -> tuple[int, int]:
+        return self._image_resolution
+
+    @image_resolution.setter
+    def image_resolution(self, resolution: tuple[int, int]):
+        # the frame shape is computed here, once per connection, rather than for every sample
+        self._image_resolution = resolution
+        self._shape = (resolution[1], resolution[0], 3)
+
     def grab_frame(self):
         self.keep_photo = True
 
@@ -696,11 +841,16 @@ class SampleGrabberCallback(COMObject):
         return 0
 
     def BufferCB(self, this, SampleTime, pBuffer: NPBUFFER, BufferLen: int) -> int:
-        if self.keep_photo:
-            self.keep_photo = False
-            img = np.ctypeslib.as_array(pBuffer, shape=(self.image_resolution[1], self.image_resolution[0], 3))
-            img = np.flip(np.copy(img), axis=0)
-            self.callback(img)
+        if not self.keep_photo:
+            return 0
+        self.keep_photo = False
+        view = np.ctypeslib.as_array(pBuffer, shape=self._shape)
+        if self.zero_copy:
+            view.flags.writeable = False
+            self.callback(view)
+        else:
+            # DIBs are stored bottom-up: flip while copying out of the sample buffer
+            self.callback(np.ascontiguousarray(view[::-1]))
         return 0
 
     # ALTERNATIVE
@@ -715,6 +865,59 @@ class SampleGrabberCallback(COMObject):
     #     return 0
 
 
+def enum_items(enum, item_type: type, batch: int = 16):
+    # Walks an IEnumXXX interface fetching `batch` items per call. The wrapped Next method declares a single
+    # out slot, so the raw vtable method is called with an array large enough for the whole batch.
+    next_items = getattr(enum, f"_{type(enum)._type_.__name__}__com_Next")
+    while True:
+        items = (POINTER(item_type) * batch)()
+        fetched = c_ulong()
+        next_items(batch, items, byref(fetched))
+        for i in range(fetched.value):
+            yield items[i]  # read each slot once: the wrapper releases the reference returned by Next
+        if fetched.value < batch:
+            break
+
+
+def map_com_calls(func: Callable[[T], R], args: list[T], max_workers: int = 8) -> list[R]:
+    # Interfaces created in a single-threaded apartment cannot be used from other threads without marshalling,
+    # so the calls are only spread over a thread pool when the process joined the multithreaded apartment
+    # (sys.coinit_flags = COINIT_MULTITHREADED set before importing comtypes)
+    if len(args) < 2 or getattr(sys, 'coinit_flags', COINIT_APARTMENTTHREADED) != COINIT_MULTITHREADED:
+        return [func(arg) for arg in args]
+
+    def call_in_mta(arg: T) -> R:
+        CoInitializeEx(COINIT_MULTITHREADED)
+        try:
+            return func(arg)
+        finally:
+            CoUninitialize()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(args))) as executor:
+        return list(executor.map(call_in_mta, args))
+
+
+# keyed on the raw 16 bytes of the GUID to skip formatting it as a string on every lookup
+_SUBTYPE_BY_BYTES = {bytes(GUID(guid)): name for guid, name in subtypes.items()}
+
+
+def get_subtype_name(subtype: GUID) -> str:
+    name = _SUBTYPE_BY_BYTES.get(bytes(subtype))
+    return name if name is not None else str(subtype)
+
+
+@lru_cache(maxsize=None)
+def _guid(guid: str) -> GUID:
+    # parsing a GUID string is not free: intern the GUIDs looked up in loops and on every graph build.
+    # The returned instance is shared, never modify it
+    return GUID(guid)
+
+
+def get_filter_name(filter: IBASEFILTER) -> str:
+    filter_info = filter.QueryFilterInfo()
+    return wstring_at(filter_info.achName)
+
+
 def get_moniker_name(moniker: IMONIKER) -> str:
     property_bag = moniker.BindToStorage(0, 0, IPropertyBag._iid_).QueryInterface(IPropertyBag)
     return property_bag.Read("FriendlyName", pErrorLog=None)